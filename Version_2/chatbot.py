@@ -41,32 +41,64 @@ class LLMChatClient:
     def __post_init__(self) -> None:
         if self.system_prompt:
             self.messages.append(Message(role="system", content=self.system_prompt))
+        # Parallel gepflegte, bereits serialisierte Nachrichtenliste, damit
+        # _payload() nicht bei jeder Frage die komplette Historie neu aufbaut.
+        self._serialized: List[Dict[str, str]] = [
+            {"role": m.role, "content": m.content} for m in self.messages
+        ]
+        # Eine Session hält die TCP-Verbindung zu Ollama offen (Keep-Alive),
+        # statt pro Frage einen neuen Verbindungsaufbau zu bezahlen.
+        self._session = requests.Session()
+
+    def close(self) -> None:
+        """Schließt die HTTP-Session."""
+        self._session.close()
+
+    def _append(self, role: str, content: str) -> None:
+        """Hängt eine Nachricht an Historie und serialisierte Liste an."""
+        self.messages.append(Message(role=role, content=content))
+        self._serialized.append({"role": role, "content": content})
 
     def _payload(self) -> Dict[str, Any]:
         return {
             "model": self.model,
-            "messages": [{"role": m.role, "content": m.content} for m in self.messages],
-            "stream": False,
+            "messages": self._serialized,
+            "stream": True,
         }
 
     def ask(self, user_text: str) -> str:
-        self.messages.append(Message(role="user", content=user_text))
+        """Streamt die Antwort tokenweise auf stdout und gibt sie komplett zurück."""
+        self._append("user", user_text)
         url = self.host.rstrip("/") + "/api/chat"
         try:
-            resp = requests.post(url, json=self._payload(), timeout=self.request_timeout)
+            resp = self._session.post(
+                url, json=self._payload(), timeout=self.request_timeout, stream=True
+            )
         except Exception as e:
             return f"Verbindungsfehler zu Ollama: {e}"
 
         if resp.status_code != 200:
             return f"HTTP {resp.status_code}: {resp.text[:200]}"
-        try:
-            data = resp.json()
-        except json.JSONDecodeError:
-            return "Ungültige JSON-Antwort von Ollama."
 
-        msg = data.get("message") or {}
-        content = msg.get("content") or "(Keine Antwort erhalten)"
-        self.messages.append(Message(role="assistant", content=content))
+        # NDJSON-Stream zeilenweise verarbeiten: jede Zeile ist ein JSON-Objekt
+        # mit einem Antwort-Delta; so erscheint die Antwort ab dem ersten Token.
+        parts: List[str] = []
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            chunk = (data.get("message") or {}).get("content") or ""
+            if chunk:
+                print(chunk, end="", flush=True)
+                parts.append(chunk)
+            if data.get("done"):
+                break
+
+        content = "".join(parts) or "(Keine Antwort erhalten)"
+        self._append("assistant", content)
         return content
 
 
@@ -91,8 +123,10 @@ def main() -> None:
             break
         if not user_text or user_text.lower() in {"exit", "quit"}:
             break
-        answer = bot.ask(user_text)
-        print(f"Assistent: {answer}\n")
+        print("Assistent: ", end="", flush=True)
+        bot.ask(user_text)
+        print("\n")
+    bot.close()
 
 
 if __name__ == "__main__":
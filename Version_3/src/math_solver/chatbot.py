@@ -5,15 +5,24 @@ Math Tutor Chatbot - Core chatbot logic with Ollama integration
 import asyncio
 import logging
 import os
+from collections import Counter
+from pathlib import Path
 from typing import AsyncGenerator, Dict, List, Optional, Any
 
 from typing import Dict
 
 from math_solver.config import ChatConfig
+from math_solver.corrections_store import CorrectionsStore
 from math_solver.models import ChatMessage
 from math_solver.ollama_client import OllamaClient
-from math_solver.tool_detector import is_basic_arithmetic, should_use_sympy, detect_basic_arithmetic, detect_math_expression
-from math_solver.tools import ArithmeticTool, SymPyTool, NumericTool, MathTool
+from math_solver.semantic_cache import SemanticCache, context_hash
+from math_solver.tool_detector import (
+    classify_input,
+    clear_detector_caches,
+    detect_basic_arithmetic,
+    detect_math_expression,
+)
+from math_solver.tools import DEFAULT_TOOLS, MathToolProtocol
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,11 +34,16 @@ logger = logging.getLogger(__name__)
 class MathTutorChatbot:
     """Main chatbot class with conversation management and tool routing."""
 
+    # Coalesce streamed chunks until this many characters or this much
+    # time has accumulated before yielding to the caller
+    STREAM_BATCH_CHARS = 64
+    STREAM_BATCH_SECONDS = 0.02
+
     def __init__(
         self,
         config: Optional[ChatConfig] = None,
         ollama_client: Optional[OllamaClient] = None,
-        tools: Optional[Dict[str, MathTool]] = None
+        tools: Optional[Dict[str, MathToolProtocol]] = None
     ) -> None:
         self.config = config or ChatConfig()
 
@@ -39,25 +53,72 @@ class MathTutorChatbot:
         if self.config.do_not_track:
             os.environ.setdefault("DO_NOT_TRACK", "1")
 
-        # Dependency injection
-        self.ollama_client = ollama_client or OllamaClient(
-            base_url=self.config.ollama_base_url,
-            timeout=60.0  # Longer timeout for math problems
+        # Dependency injection. When replica URLs are configured, a pool of
+        # clients is built and chat requests go to the replica with the
+        # fewest in-flight requests.
+        # An injected client may be shared process-wide, so only clients
+        # built here are closed by close()
+        self._owns_clients = ollama_client is None
+        if ollama_client is not None:
+            self._client_pool: List[OllamaClient] = [ollama_client]
+        else:
+            urls = [u.strip() for u in self.config.ollama_base_urls.split(",") if u.strip()]
+            if not urls:
+                urls = [self.config.ollama_base_url]
+            self._client_pool = [
+                OllamaClient(base_url=url, timeout=60.0)  # Longer timeout for math problems
+                for url in urls
+            ]
+        self.ollama_client = self._client_pool[0]
+        self._in_flight: Counter = Counter()
+
+        # Tool registry with strategy pattern, defaulting to the shared
+        # stateless singletons
+        self.tools = tools if tools is not None else dict(DEFAULT_TOOLS)
+
+        # Semantic response cache (short-circuits the LLM call on near-duplicate queries)
+        self.semantic_cache: Optional[SemanticCache] = None
+        if self.config.enable_semantic_cache:
+            self.semantic_cache = SemanticCache(
+                db_path=self.config.semantic_cache_path,
+                threshold=self.config.semantic_cache_threshold,
+                ttl=self.config.semantic_cache_ttl
+            )
+
+        # User-supplied corrections, matched against incoming messages.
+        # Stored in SQLite with an FTS5 index; a legacy JSON file next to
+        # the database is imported on first use.
+        self.corrections_store = CorrectionsStore(
+            db_path=self.config.corrections_path,
+            json_path=str(Path(self.config.corrections_path).with_suffix(".json"))
         )
 
-        # Tool registry with strategy pattern
-        self.tools = tools or {
-            "basic_arithmetic": ArithmeticTool(),
-            "sympy": SymPyTool(),
-            "numeric": NumericTool()
-        }
-
         self.conversation: List[ChatMessage] = []
+        # Ollama-format mirror of the conversation, appended to in
+        # add_message so requests don't rebuild the whole list per turn
+        self._serialized_conv: List[Dict[str, Any]] = []
         self._system_prompt = self._build_system_prompt()
+        # Frozen system message dict, reused as-is on every request so the
+        # first tokens stay byte-identical and Ollama's prompt-prefix KV
+        # cache remains valid across turns.
+        self._system_message_dict: Dict[str, Any] = {
+            "role": "system",
+            "content": self._system_prompt
+        }
 
     async def close(self):
-        """Close the Ollama client and clean up resources."""
-        await self.ollama_client.close()
+        """Close the Ollama clients and clean up resources."""
+        self.corrections_store.close()
+        if self.semantic_cache:
+            self.semantic_cache.close()
+        clear_detector_caches()
+        if self._owns_clients:
+            for client in self._client_pool:
+                await client.close()
+
+    def _pick_client(self) -> OllamaClient:
+        """Pick the replica with the fewest in-flight requests."""
+        return min(self._client_pool, key=lambda c: self._in_flight[id(c)])
 
 
     def _build_system_prompt(self) -> str:
@@ -109,23 +170,40 @@ Remember: Your goal is to help students solve math problems effectively."""
         message = ChatMessage(role=role, content=content, **kwargs)
         self.conversation.append(message)
 
+        # Keep the serialized mirror in sync
+        serialized: Dict[str, Any] = {"role": message.role, "content": message.content}
+        if message.tool_calls:
+            serialized["tool_calls"] = message.tool_calls
+        if message.tool_call_id:
+            serialized["tool_call_id"] = message.tool_call_id
+        self._serialized_conv.append(serialized)
+
     def clear_conversation(self) -> None:
         """Clear the conversation history but keep the system prompt."""
         self.conversation = []
+        self._serialized_conv = []
 
-    def get_messages_for_ollama(self) -> List[Dict[str, Any]]:
-        """Convert conversation history to Ollama message format."""
-        messages = [{"role": "system", "content": self._system_prompt}]
+    def add_correction(self, pattern: str, correction: str, explanation: str = "") -> None:
+        """Store a user-supplied correction and persist it."""
+        self.corrections_store.add(pattern, correction, explanation)
 
-        for msg in self.conversation:
-            ollama_msg = {"role": msg.role, "content": msg.content}
-            if msg.tool_calls:
-                ollama_msg["tool_calls"] = msg.tool_calls
-            if msg.tool_call_id:
-                ollama_msg["tool_call_id"] = msg.tool_call_id
-            messages.append(ollama_msg)
+    def find_applicable_correction(self, text: str) -> Optional[Dict[str, str]]:
+        """
+        Find a stored correction whose pattern occurs in text.
 
-        return messages
+        Returns the correction dict or None.
+        """
+        return self.corrections_store.find(text)
+
+    def get_messages_for_ollama(self) -> List[Dict[str, Any]]:
+        """
+        Convert conversation history to Ollama message format.
+
+        The system message is always the same frozen dict; any dynamic
+        context (tool results, correction hints) belongs in the message
+        stream after it, never in the system prompt itself.
+        """
+        return [self._system_message_dict, *self._serialized_conv]
 
     async def generate_response(self, user_input: str) -> AsyncGenerator[str, None]:
         """
@@ -133,27 +211,104 @@ Remember: Your goal is to help students solve math problems effectively."""
 
         This is the main entry point for getting chatbot responses.
         """
+        # Hash the last turns so cached answers stay context-sensitive
+        ctx_hash = context_hash([msg.content for msg in self.conversation[-2:]])
+
         # Add user message to conversation
         self.add_message("user", user_input)
 
+        # Try the semantic cache before calling the LLM
+        embedding = None
+        if self.semantic_cache:
+            try:
+                embedding = await self.ollama_client.embeddings(
+                    user_input, self.config.embedding_model
+                )
+                # SQLite read + cosine scan over the namespace goes to
+                # a worker thread, like the corrections-store lookups
+                cached = await asyncio.to_thread(
+                    self.semantic_cache.lookup,
+                    embedding, self.config.model_name, ctx_hash
+                )
+                if cached is not None:
+                    self.add_message("assistant", cached)
+                    yield cached
+                    return
+            except Exception as e:
+                # Cache problems must never block the response flow
+                logger.warning(f"Semantic cache lookup failed: {type(e).__name__}: {e}")
+                embedding = None
+
         # Get messages for Ollama
         messages = self.get_messages_for_ollama()
 
-        # Stream response from Ollama
-        full_response = ""
+        # Apply a stored correction as a trailing hint, leaving the
+        # system prefix untouched. The FTS lookup is SQLite I/O, so it
+        # runs off the loop like the rest of the store access
+        correction = await asyncio.to_thread(self.find_applicable_correction, user_input)
+        if correction:
+            hint = f"Korrekturhinweis: {correction['correction']}"
+            if correction.get("explanation"):
+                hint += f" ({correction['explanation']})"
+            messages = messages + [{"role": "system", "content": hint}]
+
+        # Stream response from Ollama, coalescing token chunks into small
+        # batches so each yield carries a useful amount of text instead of
+        # crossing the async-generator boundary per token.
+        parts: List[str] = []
+        buffer: List[str] = []
+        buffer_len = 0
+        had_error = False
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        client = self._pick_client()
+        self._in_flight[id(client)] += 1
         try:
-            async for chunk in self.ollama_client.chat_stream(
+            async for chunk in client.chat_stream(
                 messages=messages,
                 model=self.config.model_name,
                 temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens
+                max_tokens=self.config.max_tokens,
+                keep_alive=self.config.keep_alive
             ):
-                full_response += chunk
-                yield chunk
+                parts.append(chunk)
+                buffer.append(chunk)
+                buffer_len += len(chunk)
+                now = loop.time()
+                if buffer_len >= self.STREAM_BATCH_CHARS or now - last_flush >= self.STREAM_BATCH_SECONDS:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    buffer_len = 0
+                    last_flush = now
         except Exception as e:
             logger.error(f"Ollama client error: {type(e).__name__}: {e}")
+            had_error = True
+            # Flush the partial text first so the error arrives last,
+            # matching the unbatched streaming order
+            if buffer:
+                yield "".join(buffer)
+                buffer.clear()
             # Don't re-raise here, let the caller handle it
             yield f"Error: {str(e)}"
+        finally:
+            self._in_flight[id(client)] -= 1
+
+        # Flush whatever is left in the coalescing buffer
+        if buffer:
+            yield "".join(buffer)
+
+        full_response = "".join(parts)
+
+        # Cache the completed response for future near-duplicate queries
+        if self.semantic_cache and embedding and full_response and not had_error:
+            try:
+                await asyncio.to_thread(
+                    self.semantic_cache.store,
+                    embedding, user_input, full_response,
+                    self.config.model_name, ctx_hash
+                )
+            except Exception as e:
+                logger.warning(f"Semantic cache store failed: {type(e).__name__}: {e}")
 
         # Add assistant response to conversation
         self.add_message("assistant", full_response)
@@ -166,20 +321,7 @@ Remember: Your goal is to help students solve math problems effectively."""
 
         Returns tool name or None if no tool is needed.
         """
-        # Check for basic arithmetic first (highest priority)
-        if is_basic_arithmetic(user_input):
-            return "basic_arithmetic"
-
-        # Check for math expressions that need SymPy
-        math_expr = detect_math_expression(user_input)
-        if math_expr and should_use_sympy(user_input):
-            return "sympy"
-
-        # Check for numeric evaluation (fallback for complex numbers)
-        if math_expr and not should_use_sympy(user_input):
-            return "numeric"
-
-        return None
+        return classify_input(user_input)
 
     async def _execute_tool(self, tool_name: str, user_input: str) -> Optional[str]:
         """
@@ -222,6 +364,11 @@ Remember: Your goal is to help students solve math problems effectively."""
             # Execute tool and yield result
             tool_result = await self._execute_tool(tool_name, user_input)
             if tool_result:
+                correction = await asyncio.to_thread(
+                    self.find_applicable_correction, user_input
+                )
+                if correction:
+                    tool_result += f"\n\n*Korrektur angewendet:* {correction['correction']}"
                 yield {"type": "tool_result", "content": tool_result, "tool": tool_name}
                 # Add tool result to conversation for context
                 self.add_message("assistant", tool_result)
@@ -3,17 +3,37 @@ Configuration classes for the math solver chatbot.
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
 class ChatConfig:
-    """Configuration for the chat session."""
-    model_name: str = os.getenv("MODEL_NAME", "gemma3:1b")
-    ollama_base_url: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    temperature: float = float(os.getenv("TEMPERATURE", "0.2"))
-    max_tokens: int = int(os.getenv("MAX_TOKENS", "2048"))
-    disable_telemetry: bool = os.getenv("DISABLE_TELEMETRY", "true").lower() == "true"
-    do_not_track: bool = os.getenv("DO_NOT_TRACK", "1") == "1"
+    """
+    Configuration for the chat session.
+
+    Environment variables are read when an instance is constructed (via
+    default factories), not at import time, so tests and callers can
+    override the environment without reloading the module.
+    """
+    model_name: str = field(default_factory=lambda: os.getenv("MODEL_NAME", "gemma3:1b"))
+    ollama_base_url: str = field(default_factory=lambda: os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    # Optional comma-separated list of Ollama replica URLs; chat requests are
+    # load-balanced across them (falls back to ollama_base_url when empty)
+    ollama_base_urls: str = field(default_factory=lambda: os.getenv("OLLAMA_BASE_URLS", ""))
+    temperature: float = field(default_factory=lambda: float(os.getenv("TEMPERATURE", "0.2")))
+    max_tokens: int = field(default_factory=lambda: int(os.getenv("MAX_TOKENS", "2048")))
+    disable_telemetry: bool = field(default_factory=lambda: os.getenv("DISABLE_TELEMETRY", "true").lower() == "true")
+    do_not_track: bool = field(default_factory=lambda: os.getenv("DO_NOT_TRACK", "1") == "1")
     # Default language for the UI and assistant responses. Use ISO language codes, e.g. 'de' for German.
-    language: str = os.getenv("LANGUAGE", "de")
+    language: str = field(default_factory=lambda: os.getenv("LANGUAGE", "de"))
+    # How long Ollama should keep the model (and its KV cache) resident
+    keep_alive: str = field(default_factory=lambda: os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+    # User-supplied corrections persisted across sessions (SQLite FTS5 DB;
+    # a .json file with the same stem is imported once for migration)
+    corrections_path: str = field(default_factory=lambda: os.getenv("CORRECTIONS_PATH", "math_corrections.db"))
+    # Semantic response cache (skips the LLM call for near-duplicate questions)
+    enable_semantic_cache: bool = field(default_factory=lambda: os.getenv("ENABLE_SEMANTIC_CACHE", "true").lower() == "true")
+    semantic_cache_path: str = field(default_factory=lambda: os.getenv("SEMANTIC_CACHE_PATH", "semantic_cache.db"))
+    semantic_cache_threshold: float = field(default_factory=lambda: float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")))
+    semantic_cache_ttl: float = field(default_factory=lambda: float(os.getenv("SEMANTIC_CACHE_TTL", "3600")))
+    embedding_model: str = field(default_factory=lambda: os.getenv("EMBEDDING_MODEL", "nomic-embed-text"))
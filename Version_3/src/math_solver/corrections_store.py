@@ -0,0 +1,128 @@
+"""
+SQLite-backed storage for user-supplied corrections.
+
+Corrections are kept in an FTS5 virtual table so pattern lookup uses the
+tokenized inverted index instead of a linear scan over every stored
+entry — lookups stay fast even with tens of thousands of corrections.
+A legacy math_corrections.json file is imported automatically on first
+use.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class CorrectionsStore:
+    """FTS5-indexed corrections with substring-verified matching."""
+
+    # How many index candidates to verify per lookup
+    MATCH_CANDIDATES = 20
+
+    def __init__(self, db_path: str = "math_corrections.db", json_path: Optional[str] = None) -> None:
+        self.db_path = db_path
+        # Callers run add/find through asyncio.to_thread, so the
+        # connection must be usable from worker threads; the lock
+        # serializes access since sqlite3 connections are not
+        # concurrency-safe on their own
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS corrections "
+            "USING fts5(pattern, correction, explanation, tokenize='unicode61')"
+        )
+        self._conn.commit()
+        if json_path:
+            self._import_json(json_path)
+
+    def _import_json(self, json_path: str) -> None:
+        """One-time migration from the legacy JSON corrections list."""
+        if self.count() > 0 or not Path(json_path).exists():
+            return
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                self.add(
+                    entry.get("pattern", ""),
+                    entry.get("correction", ""),
+                    entry.get("explanation", "")
+                )
+            logger.info(f"Imported {len(entries)} corrections from {json_path}")
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Could not import corrections from JSON: {type(e).__name__}: {e}")
+
+    def add(self, pattern: str, correction: str, explanation: str = "") -> None:
+        """Insert a correction into the index."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO corrections (pattern, correction, explanation) VALUES (?, ?, ?)",
+                (pattern, correction, explanation)
+            )
+            self._conn.commit()
+
+    def find(self, text: str) -> Optional[Dict[str, str]]:
+        """
+        Find a stored correction whose pattern occurs in text.
+
+        The FTS5 index narrows the candidates to patterns sharing tokens
+        with the input (BM25-ranked); each candidate is then verified by
+        substring containment so matching semantics stay exact.
+        """
+        tokens = _TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return None
+        match_query = " OR ".join(f'"{token}"' for token in tokens)
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT pattern, correction, explanation FROM corrections "
+                    "WHERE corrections MATCH ? ORDER BY rank LIMIT ?",
+                    (match_query, self.MATCH_CANDIDATES)
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Corrections lookup failed: {e}")
+            return None
+
+        text_lower = text.lower()
+        for pattern, correction, explanation in rows:
+            if pattern.lower() in text_lower:
+                return {
+                    "pattern": pattern,
+                    "correction": correction,
+                    "explanation": explanation
+                }
+        return None
+
+    def all(self) -> List[Dict[str, str]]:
+        """Return every stored correction."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pattern, correction, explanation FROM corrections"
+            ).fetchall()
+        return [
+            {"pattern": p, "correction": c, "explanation": e}
+            for p, c, e in rows
+        ]
+
+    def count(self) -> int:
+        """Number of stored corrections."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+
+    def export_json(self, json_path: str) -> None:
+        """Write all corrections back out as JSON (for backup/migration)."""
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.all(), f, ensure_ascii=False, indent=2)
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        self._conn.close()
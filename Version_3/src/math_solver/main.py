@@ -9,6 +9,7 @@ import asyncio
 import logging
 
 
+from math_solver.ollama_client import close_shared_client
 from math_solver.services import ChatbotService, ConfigService
 from math_solver.ui import MessageHandler, UIComponents
 
@@ -44,6 +45,7 @@ async def main() -> None:
         # Clean up resources
         logger.info("Shutting down Math Solver application...")
         await chatbot_service.close()
+        await close_shared_client()
 
 
 if __name__ == "__main__":
@@ -2,28 +2,70 @@
 Math evaluation functions for the chatbot.
 """
 
+import ast
 import logging
-
-import mpmath as mp
-import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+import operator
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# SymPy and mpmath are imported lazily on first use: SymPy alone costs
+# several hundred milliseconds at import, and sessions that only do
+# basic arithmetic never need either library.
+_sp = None
+_mp = None
+_parse_expr = None
+_SAFE_TRANSFORMATIONS = None
+
+
+def _get_sympy():
+    """Import SymPy on first use and cache the module and parser setup."""
+    global _sp, _parse_expr, _SAFE_TRANSFORMATIONS
+    if _sp is None:
+        import sympy as sp
+        from sympy.parsing.sympy_parser import (
+            parse_expr,
+            standard_transformations,
+            implicit_multiplication_application,
+        )
+        _parse_expr = parse_expr
+        # Parser transformations are constant; build the tuple once
+        _SAFE_TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application,)
+        _sp = sp
+    return _sp
+
+
+def _get_mpmath():
+    """Import mpmath on first use."""
+    global _mp
+    if _mp is None:
+        import mpmath
+        _mp = mpmath
+    return _mp
+
 
-def safe_sympy_eval(expression: str, timeout: float = 5.0) -> tuple[bool, str]:
+def safe_sympy_eval(expression: str, timeout: float = 5.0, full: bool = False) -> tuple[bool, str]:
     """
     Safely evaluate a mathematical expression using SymPy.
 
+    Results are memoized per normalized expression, so repeated queries
+    for the same canonical form skip parsing and simplification entirely.
+
+    Pass full=True to force a full sp.simplify pass; by default a much
+    cheaper canonicalization is used.
+
     Returns (success: bool, result: str)
     """
-    try:
-        # Parse with safety transformations
-        transformations = standard_transformations + (implicit_multiplication_application,)
+    return _safe_sympy_eval_cached(expression.strip(), timeout, full)
 
+
+@lru_cache(maxsize=4096)
+def _safe_sympy_eval_cached(expression: str, timeout: float, full: bool) -> tuple[bool, str]:
+    sp = _get_sympy()
+    try:
         # Evaluate without timeout context since it runs in async context
         # First try to parse as a symbolic expression
-        expr = parse_expr(expression, transformations=transformations)
+        expr = _parse_expr(expression, transformations=_SAFE_TRANSFORMATIONS)
 
         # Common SymPy operations
         if isinstance(expr, sp.Eq):
@@ -45,8 +87,18 @@ def safe_sympy_eval(expression: str, timeout: float = 5.0) -> tuple[bool, str]:
                 return True, f"Function: {sp.latex(expr)}"
 
         else:
-            # General symbolic evaluation
-            simplified = sp.simplify(expr)
+            # General symbolic evaluation. Full simplify() runs many
+            # transformation passes and is the slowest routine in SymPy;
+            # for display purposes a cheap canonicalization suffices.
+            if full:
+                simplified = sp.simplify(expr)
+            elif not expr.free_symbols:
+                # Pure number: evaluate and prefer an exact rational form
+                evaluated = expr.doit() if hasattr(expr, 'doit') else expr
+                simplified = sp.nsimplify(evaluated, rational=True)
+            else:
+                # Symbolic: cancel() normalizes rational expressions cheaply
+                simplified = sp.cancel(expr)
             return True, f"Result: {sp.latex(simplified)}"
 
     except (sp.SympifyError, ValueError, TypeError) as e:
@@ -60,15 +112,23 @@ def safe_numeric_eval(expression: str, precision: int = 50, timeout: float = 3.0
     """
     Evaluate expressions numerically with high precision using mpmath.
 
+    Results are memoized per normalized expression and precision.
+
     Returns (success: bool, result: str)
     """
-    try:
-        # Set high precision
-        mp.mp.dps = precision
+    return _safe_numeric_eval_cached(expression.strip(), precision, timeout)
 
-        # Evaluate without timeout context since it runs in async context
-        # Try to evaluate with mpmath
-        result = mp.eval(expression)
+
+@lru_cache(maxsize=4096)
+def _safe_numeric_eval_cached(expression: str, precision: int, timeout: float) -> tuple[bool, str]:
+    mp = _get_mpmath()
+    try:
+        # Evaluate without timeout context since it runs in async context.
+        # workdps scopes the precision to this block instead of mutating
+        # global mpmath state, which concurrent to_thread evaluations with
+        # different precisions would otherwise corrupt.
+        with mp.workdps(precision):
+            result = mp.eval(expression)
 
         # Format result nicely
         if isinstance(result, mp.mpf):
@@ -95,15 +155,52 @@ def safe_arithmetic_eval(expression: str, timeout: float = 2.0) -> tuple[bool, s
     Uses a restricted environment to prevent code execution.
     Only allows basic arithmetic operations: +, -, *, /, **, ()
 
+    Results are memoized per normalized expression.
+
     Returns (success: bool, result: str)
     """
-    try:
-        # Define safe namespace with only basic math operations
-        safe_dict = {
-            "__builtins__": {},
-            # Basic arithmetic operators are available by default in eval
-        }
+    return _safe_arithmetic_eval_cached(expression.strip(), timeout)
+
+
+# Operators the arithmetic evaluator accepts; anything else is rejected
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
 
+
+@lru_cache(maxsize=4096)
+def _parse_arithmetic(expression: str) -> ast.Expression:
+    """Parse an arithmetic expression once and cache the AST."""
+    return ast.parse(expression, mode="eval")
+
+
+def _eval_ast(node) -> float:
+    """
+    Evaluate an AST consisting only of numeric literals, the basic binary
+    operators and unary sign. Any other node type raises ValueError.
+    """
+    if isinstance(node, ast.Expression):
+        return _eval_ast(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return _BIN_OPS[type(node.op)](_eval_ast(node.left), _eval_ast(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval_ast(node.operand))
+    raise ValueError(f"Unsupported element in arithmetic expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=4096)
+def _safe_arithmetic_eval_cached(expression: str, timeout: float) -> tuple[bool, str]:
+    try:
         # Clean the expression - remove spaces and validate characters
         cleaned_expr = expression.replace(" ", "")
 
@@ -116,8 +213,9 @@ def safe_arithmetic_eval(expression: str, timeout: float = 2.0) -> tuple[bool, s
         if "/0" in cleaned_expr or "/0." in cleaned_expr:
             return False, "Division by zero"
 
-        # Evaluate without timeout since arithmetic is very fast and runs in async context
-        result = eval(cleaned_expr, safe_dict)
+        # Walk the (cached) AST directly instead of going through eval():
+        # only numeric literals and basic operators can ever execute
+        result = _eval_ast(_parse_arithmetic(cleaned_expr))
 
         # Format the result nicely
         if isinstance(result, (int, float)):
@@ -137,6 +235,14 @@ def safe_arithmetic_eval(expression: str, timeout: float = 2.0) -> tuple[bool, s
         return False, f"Arithmetic evaluation failed: {str(e)}"
 
 
+def clear_math_caches() -> None:
+    """Clear the memoization caches of all evaluators (mainly for tests)."""
+    _safe_sympy_eval_cached.cache_clear()
+    _safe_numeric_eval_cached.cache_clear()
+    _safe_arithmetic_eval_cached.cache_clear()
+    _parse_arithmetic.cache_clear()
+
+
 async def evaluate_with_sympy(expression: str) -> str:
     """
     Async wrapper for safe SymPy evaluation.
@@ -164,23 +270,39 @@ async def evaluate_numerically(expression: str) -> str:
     """
     Async wrapper for numeric evaluation with fallback to SymPy.
 
+    Both evaluations are started concurrently, so a numeric failure falls
+    back to an already-running SymPy evaluation instead of starting it
+    cold — worst-case latency is the larger of the two timeouts, not
+    their sum.
+
     Returns formatted result string for the chatbot.
     """
-    try:
-        # First try numeric evaluation with timeout
-        import asyncio
-        success, result = await asyncio.wait_for(
-            asyncio.to_thread(safe_numeric_eval, expression, 50, 3.0),
-            timeout=3.0
-        )
-        if success:
-            return f"**Numeric Result:**\n{result}"
+    import asyncio
+    import contextlib
+
+    numeric_task = asyncio.ensure_future(asyncio.wait_for(
+        asyncio.to_thread(safe_numeric_eval, expression, 50, 3.0),
+        timeout=3.0
+    ))
+    sympy_task = asyncio.ensure_future(asyncio.wait_for(
+        asyncio.to_thread(safe_sympy_eval, expression, 5.0),
+        timeout=5.0
+    ))
 
-        # Fallback to SymPy for symbolic expressions with timeout
-        success, result = await asyncio.wait_for(
-            asyncio.to_thread(safe_sympy_eval, expression, 5.0),
-            timeout=5.0
-        )
+    try:
+        # Prefer the numeric result when it succeeds
+        try:
+            success, result = await numeric_task
+            if success:
+                sympy_task.cancel()
+                with contextlib.suppress(Exception, asyncio.CancelledError):
+                    await sympy_task
+                return f"**Numeric Result:**\n{result}"
+        except asyncio.TimeoutError:
+            pass
+
+        # Numeric failed or timed out — use the concurrent SymPy run
+        success, result = await sympy_task
         if success:
             return f"**Symbolic Result:**\n{result}"
         else:
@@ -189,6 +311,10 @@ async def evaluate_numerically(expression: str) -> str:
         return "**Evaluation Error:** Calculation timed out"
     except Exception as e:
         return f"**Evaluation Error:** {str(e)}"
+    finally:
+        for task in (numeric_task, sympy_task):
+            if not task.done():
+                task.cancel()
 
 
 async def evaluate_basic_arithmetic(expression: str) -> str:
@@ -3,11 +3,12 @@ HTTP client for Ollama API with streaming and retries.
 """
 
 import asyncio
-import json
 import logging
-from typing import AsyncGenerator, Dict, List, Any, TypedDict
+from functools import lru_cache
+from typing import AsyncGenerator, Dict, List, Any, Optional, TypedDict
 
 import httpx
+import orjson
 
 
 class OllamaMessage(TypedDict):
@@ -24,15 +25,50 @@ class OllamaOptions(TypedDict, total=False):
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=64)
+def _payload_template(model: str, temperature: float, max_tokens: int, keep_alive: str) -> Dict[str, Any]:
+    """
+    Build the static part of a chat payload once per distinct settings tuple.
+
+    In practice a session uses one (model, temperature, max_tokens,
+    keep_alive) combination, so every call after the first reuses the
+    same dict and only sets `messages` on a shallow copy.
+    """
+    return {
+        "model": model,
+        "stream": True,
+        "keep_alive": keep_alive,
+        "options": {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+        }
+    }
+
+
 class OllamaClient:
     """HTTP client for Ollama API with streaming and retries."""
 
+    # Pool tuning for a single local host hit repeatedly: generous
+    # keep-alive so streaming + retry traffic never pays a new TCP
+    # handshake. Shared by __init__ and reconnect().
+    _LIMITS = httpx.Limits(
+        max_keepalive_connections=50,
+        max_connections=100,
+        keepalive_expiry=60.0
+    )
+
     def __init__(self, base_url: str = "http://localhost:11434", timeout: float = 30.0):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.client = self._build_client()
         self._is_closed = False
 
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create an AsyncClient with the tuned pool limits."""
+        # trust_env=False skips proxy/env lookups that never apply to a
+        # localhost Ollama endpoint
+        return httpx.AsyncClient(timeout=self.timeout, limits=self._LIMITS, trust_env=False)
+
     async def __aenter__(self):
         return self
 
@@ -59,23 +95,35 @@ class OllamaClient:
                 await self.client.aclose()
         except Exception as e:
             logger.warning(f"Error closing old client during reconnection: {e}")
-        self.client = httpx.AsyncClient(timeout=self.timeout)
+        self.client = self._build_client()
         self._is_closed = False
         logger.info("Ollama client reconnected")
 
     async def health_check(self) -> bool:
         """Check if the Ollama service is healthy and accessible."""
         try:
-            # Try a simple request to check connectivity
-            async with self.client.get(
-                f"{self.base_url}/api/tags",
-                timeout=5.0
-            ) as response:
-                return response.status_code == 200
+            # Plain await — the GET is not streamed, so the context-manager
+            # form only adds coroutine frames around the same request
+            response = await self.client.get(f"{self.base_url}/api/tags", timeout=5.0)
+            return response.status_code == 200
         except Exception as e:
             logger.debug(f"Health check failed: {type(e).__name__}: {e}")
             return False
 
+    async def embeddings(self, text: str, model: str = "nomic-embed-text") -> List[float]:
+        """
+        Get an embedding vector for a text via Ollama's embeddings API.
+
+        Returns the embedding as a list of floats.
+        """
+        response = await self.client.post(
+            f"{self.base_url}/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json().get("embedding", [])
+
     async def chat_stream(
         self,
         messages: List[OllamaMessage],
@@ -83,22 +131,23 @@ class OllamaClient:
         temperature: float = 0.2,
         max_tokens: int = 2048,
         retries: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        keep_alive: str = "30m"
     ) -> AsyncGenerator[str, None]:
         """
         Stream chat responses from Ollama with retry logic and reconnection.
 
+        keep_alive asks the server to keep the model and its prompt KV
+        cache resident between calls, so subsequent turns skip reload and
+        prefill of the shared prefix.
+
         Yields chunks of response text as they arrive.
         """
-        payload = {
-            "model": model,
-            "messages": messages,
-            "stream": True,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-            }
-        }
+        payload = {**_payload_template(model, temperature, max_tokens, keep_alive),
+                   "messages": messages}
+
+        # Exponential backoff schedule, computed once outside the error path
+        delays = tuple(retry_delay * (1 << i) for i in range(retries))
 
         last_exception = None
         for attempt in range(retries + 1):
@@ -110,62 +159,104 @@ class OllamaClient:
                 async with self.client.stream(
                     "POST",
                     f"{self.base_url}/api/chat",
-                    json=payload,
+                    content=orjson.dumps(payload),
+                    headers={"content-type": "application/json"},
                     timeout=self.timeout
                 ) as response:
                     response.raise_for_status()
 
-                    async for line in response.aiter_lines():
-                        if line.strip():
+                    # Split NDJSON lines out of the raw byte stream
+                    # ourselves: aiter_lines() decodes and re-buffers text
+                    # per line, while a bytearray buffer hands each line to
+                    # orjson with a single slice and no str round-trip.
+                    buf = bytearray()
+                    done = False
+                    async for chunk in response.aiter_raw(chunk_size=65536):
+                        buf.extend(chunk)
+                        start = 0
+                        while True:
+                            nl = buf.find(b"\n", start)
+                            if nl < 0:
+                                break
+                            line = bytes(buf[start:nl])
+                            start = nl + 1
+                            if not line.strip():
+                                continue
                             try:
-                                data = json.loads(line)
-                                if "message" in data and "content" in data["message"]:
-                                    content = data["message"]["content"]
-                                    if content:  # Only yield non-empty content
-                                        yield content
-                                elif data.get("done", False):
-                                    break  # End of stream
-                            except json.JSONDecodeError:
-                                logger.warning(f"Failed to parse JSON line: {line}")
+                                data = orjson.loads(line)
+                            except orjson.JSONDecodeError:
+                                logger.warning(f"Failed to parse JSON line: {line!r}")
                                 continue
+                            if "message" in data and "content" in data["message"]:
+                                content = data["message"]["content"]
+                                if content:  # Only yield non-empty content
+                                    yield content
+                            elif data.get("done", False):
+                                done = True
+                                break  # End of stream
+                        del buf[:start]
+                        if done:
+                            break
 
                 return  # Success, exit retry loop
 
             except (httpx.ConnectError, httpx.TimeoutException) as e:
                 # Connection issues - try reconnecting
                 last_exception = e
-                logger.warning(f"Ollama connection failed (attempt {attempt + 1}/{retries + 1}): {type(e).__name__}: {e}")
-
-                if attempt < retries:
-                    try:
-                        await self.reconnect()
-                        logger.info(f"Reconnected successfully, retrying request...")
-                    except Exception as reconn_err:
-                        logger.error(f"Reconnection failed: {reconn_err}")
+                desc = f"{type(e).__name__}: {e}"
+                logger.warning(f"Ollama connection failed (attempt {attempt + 1}/{retries + 1}): {desc}")
 
-                    await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
-                else:
-                    logger.error(f"Ollama connection failed after {retries + 1} attempts: {type(e).__name__}: {e}")
+                if attempt >= retries:
+                    logger.error(f"Ollama connection failed after {retries + 1} attempts: {desc}")
                     raise last_exception
+                try:
+                    await self.reconnect()
+                    logger.info("Reconnected successfully, retrying request...")
+                except Exception as reconn_err:
+                    logger.error(f"Reconnection failed: {reconn_err}")
+                await asyncio.sleep(delays[attempt])
 
-            except httpx.HTTPStatusError as e:
-                # HTTP errors (4xx, 5xx) - don't reconnect, just retry
+            except Exception as e:
+                # HTTP errors (4xx, 5xx) and anything unexpected - don't
+                # reconnect, just back off and retry on the same pool
                 last_exception = e
-                logger.warning(f"Ollama HTTP error (attempt {attempt + 1}/{retries + 1}): {e.response.status_code} {e.response.reason_phrase}")
-
-                if attempt < retries:
-                    await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+                if isinstance(e, httpx.HTTPStatusError):
+                    label = "Ollama HTTP error"
+                    desc = f"{e.response.status_code} {e.response.reason_phrase}"
                 else:
-                    logger.error(f"Ollama HTTP error after {retries + 1} attempts: {e.response.status_code} {e.response.reason_phrase}")
+                    label = "Unexpected error in Ollama chat stream"
+                    desc = f"{type(e).__name__}: {e}"
+                logger.warning(f"{label} (attempt {attempt + 1}/{retries + 1}): {desc}")
+
+                if attempt >= retries:
+                    logger.error(f"{label} after {retries + 1} attempts: {desc}")
                     raise last_exception
+                await asyncio.sleep(delays[attempt])
 
-            except Exception as e:
-                # Other unexpected errors
-                last_exception = e
-                logger.error(f"Unexpected error in Ollama chat stream (attempt {attempt + 1}/{retries + 1}): {type(e).__name__}: {e}")
 
-                if attempt < retries:
-                    await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
-                else:
-                    logger.error(f"Unexpected error after {retries + 1} attempts: {type(e).__name__}: {e}")
-                    raise last_exception
+# Process-wide shared client. Connection keep-alive only pays off when
+# every service hits the same httpx pool, so services that don't inject
+# their own client borrow this one instead of building a new pool each.
+_shared_client: Optional[OllamaClient] = None
+
+
+def get_shared_client(base_url: str = "http://localhost:11434", timeout: float = 60.0) -> OllamaClient:
+    """
+    Return the process-wide OllamaClient, building it on first use.
+
+    The first caller's base_url/timeout win; later callers get the same
+    instance. Borrowers must not close it — use close_shared_client()
+    from the application shutdown path instead.
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = OllamaClient(base_url=base_url, timeout=timeout)
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Close the shared client at application shutdown, if it was built."""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
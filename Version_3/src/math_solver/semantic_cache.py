@@ -0,0 +1,142 @@
+"""
+Semantic response cache for the math solver chatbot.
+
+Caches full assistant responses keyed by an embedding of the user input,
+so semantically equivalent questions ("Was ist 25% von 250?" vs.
+"Berechne 25 Prozent von 250") can be answered without a new LLM call.
+Entries are persisted in SQLite, namespaced by model name and a hash of
+the recent conversation context, and expire after a TTL.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Compute cosine similarity between two embedding vectors."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+
+    dot = math.fsum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(math.fsum(x * x for x in a))
+    norm_b = math.sqrt(math.fsum(y * y for y in b))
+
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def context_hash(parts: List[str]) -> str:
+    """Hash the recent conversation turns into a short context key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+class SemanticCache:
+    """
+    Embedding-keyed response cache persisted via SQLite.
+
+    Lookups compare the query embedding against stored entries with the
+    same (model, context_hash) namespace and return the cached response
+    when cosine similarity reaches the configured threshold.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "semantic_cache.db",
+        threshold: float = 0.92,
+        ttl: float = 3600.0
+    ) -> None:
+        self.db_path = db_path
+        self.threshold = threshold
+        self.ttl = ttl
+        # Callers run lookup/store through asyncio.to_thread, so the
+        # connection must be usable from worker threads; the lock
+        # serializes access since sqlite3 connections are not
+        # concurrency-safe on their own
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model TEXT NOT NULL,
+                context_hash TEXT NOT NULL,
+                user_input TEXT NOT NULL,
+                embedding TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_namespace "
+            "ON cache_entries (model, context_hash)"
+        )
+        self._conn.commit()
+
+    def lookup(
+        self,
+        embedding: List[float],
+        model: str,
+        ctx_hash: str
+    ) -> Optional[str]:
+        """Return a cached response for a near-duplicate query, or None."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT embedding, response FROM cache_entries "
+                "WHERE model = ? AND context_hash = ? AND created_at >= ?",
+                (model, ctx_hash, cutoff)
+            ).fetchall()
+
+        best_score = 0.0
+        best_response: Optional[str] = None
+        for stored_embedding, response in rows:
+            score = cosine_similarity(embedding, json.loads(stored_embedding))
+            if score > best_score:
+                best_score = score
+                best_response = response
+
+        if best_response is not None and best_score >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity={best_score:.3f})")
+            return best_response
+        return None
+
+    def store(
+        self,
+        embedding: List[float],
+        user_input: str,
+        response: str,
+        model: str,
+        ctx_hash: str
+    ) -> None:
+        """Insert a new cache entry and drop expired ones."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE created_at < ?",
+                (now - self.ttl,)
+            )
+            self._conn.execute(
+                "INSERT INTO cache_entries "
+                "(model, context_hash, user_input, embedding, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (model, ctx_hash, user_input, json.dumps(embedding), response, now)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        self._conn.close()
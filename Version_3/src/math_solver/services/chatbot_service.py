@@ -6,8 +6,8 @@ from typing import Optional
 
 from math_solver.config import ChatConfig
 from math_solver.chatbot import MathTutorChatbot
-from math_solver.ollama_client import OllamaClient
-from math_solver.tools import ArithmeticTool, NumericTool, SymPyTool
+from math_solver.ollama_client import OllamaClient, get_shared_client
+from math_solver.tools import DEFAULT_TOOLS
 
 
 class ChatbotService:
@@ -20,17 +20,17 @@ class ChatbotService:
     ) -> None:
         """Initialize the chatbot service with dependencies."""
         self.config = config or ChatConfig()
-        self.ollama_client = ollama_client or OllamaClient(
+        # Borrow the process-wide client unless one is injected, so
+        # repeated service construction (e.g. Gradio reloads) keeps
+        # reusing the same httpx connection pool
+        self.ollama_client = ollama_client or get_shared_client(
             base_url=self.config.ollama_base_url,
             timeout=60.0
         )
 
-        # Create tool instances
-        self.tools = {
-            "basic_arithmetic": ArithmeticTool(),
-            "sympy": SymPyTool(),
-            "numeric": NumericTool()
-        }
+        # Shared stateless tool singletons; copy so per-service
+        # registrations don't leak into other services
+        self.tools = dict(DEFAULT_TOOLS)
 
         # Initialize chatbot with all dependencies
         self.chatbot = MathTutorChatbot(
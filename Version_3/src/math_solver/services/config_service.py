@@ -14,9 +14,20 @@ class ConfigService:
     def __init__(self, chatbot_service: ChatbotService) -> None:
         """Initialize config service with chatbot service dependency."""
         self.chatbot_service = chatbot_service
+        # The config is immutable between reloads, so the display string is
+        # rendered once and returned from cache on every refresh click
+        self._cached_display = self._render()
+
+    def invalidate(self) -> None:
+        """Re-render the cached display after a config change."""
+        self._cached_display = self._render()
 
     def get_config_display(self) -> str:
         """Get formatted configuration display."""
+        return self._cached_display
+
+    def _render(self) -> str:
+        """Build the formatted configuration display string."""
         config = self.chatbot_service.get_config()
 
         config_info = f"""
@@ -3,37 +3,114 @@ Tool detection logic for the math solver chatbot.
 """
 
 import re
+from functools import lru_cache
 from typing import Optional
 
-
+# All patterns are compiled once at import; per-call compilation (or the
+# re-cache lookup for string patterns) is pure overhead on the chat hot path.
+
+# Cheap prefilter: most chat messages contain no math at all, and a single
+# linear scan for digits/operators/keywords rejects them before any of the
+# heavier patterns run.
+_HAS_MATH_CHARS = re.compile(
+    r"[0-9+\-*/=^$()]"
+    r"|\b(?:solve|simplify|factor|diff|integrate|limit|plus|minus|times|divided)\b",
+    re.IGNORECASE
+)
+
+# Patterns that indicate mathematical expressions, in priority order.
+# The list is fused into one alternation with named groups, so the
+# common case is a single scan over the text; matches are then grouped
+# back by pattern. Because the fused scan is leftmost-first, a
+# lower-priority alternative matching earlier can consume text that
+# contains a higher-priority match, so the detector rescans the
+# higher-priority patterns individually before accepting such a winner.
+_MATH_PATTERN_STRS = (
+    r'\b(?:solve|simplify|factor|diff|integrate|limit|series|matrix)\s*\([^)]+\)',  # Function calls
+    r'\b\d+(?:\.\d+)?\s*[+\-*/^]\s*\d+(?:\.\d+)?',  # Basic arithmetic
+    r'\b[a-zA-Z]+\s*=\s*[^=\n]+',  # Variable assignments
+    r'\b[a-zA-Z]+\([^)]*\)\s*=\s*[^=\n]+',  # Function definitions
+    r'\$.*\$',  # LaTeX expressions (extract content)
+)
+_MATH_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in _MATH_PATTERN_STRS)
+_MATH_COMBINED = re.compile(
+    "|".join(f"(?P<m{i}>{p})" for i, p in enumerate(_MATH_PATTERN_STRS)),
+    re.IGNORECASE
+)
+
+# Direct arithmetic patterns (numbers with operators), in priority order
+_ARITH_PATTERN_STRS = (
+    r'\d+(?:\.\d+)?\s*[+\-*/]\s*\d+(?:\.\d+)?(?:\s*[+\-*/]\s*\d+(?:\.\d+)?)*',  # Multiple operations
+    r'\d+(?:\.\d+)?\s*\*\*\s*\d+(?:\.\d+)?',  # Exponentiation
+    r'\(\s*\d+(?:\.\d+)?\s*[+\-*/]\s*\d+(?:\.\d+)?\s*\)',  # Parenthesized expressions
+)
+_ARITH_COMBINED = re.compile(
+    "|".join(f"(?P<a{i}>{p})" for i, p in enumerate(_ARITH_PATTERN_STRS)),
+    re.IGNORECASE
+)
+
+# Natural language patterns (matched against lowercased text)
+_NL_PATTERNS = [re.compile(p) for p in (
+    # "what is X plus Y", "what is X minus Y", etc.
+    r'what\s+is\s+(\d+(?:\.\d+)?)\s*(plus|minus|times|multiplied\s+by|divided\s+by)\s+(\d+(?:\.\d+)?)',
+    # "calculate X + Y", "compute X * Y", etc.
+    r'(?:calculate|compute)\s+(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)',
+    # "X plus Y equals", "X times Y is", etc.
+    r'(\d+(?:\.\d+)?)\s*(plus|minus|times|multiplied\s+by|divided\s+by)\s+(\d+(?:\.\d+)?)\s*(?:equals|is|=)',
+)]
+
+# Word operators to symbols
+_OP_MAP = {
+    'plus': '+',
+    'minus': '-',
+    'times': '*',
+    'multiplied by': '*',
+    'divided by': '/'
+}
+
+
+@lru_cache(maxsize=512)
 def detect_math_expression(text: str) -> Optional[str]:
     """
     Detect mathematical expressions in text that should use SymPy evaluation.
 
+    Results are memoized per message: classification and tool dispatch
+    may consult the detectors several times for the same text.
+
     Returns the detected expression or None if no clear math expression found.
     """
-    # Common patterns that indicate mathematical expressions
-    patterns = [
-        r'\b(?:solve|simplify|factor|diff|integrate|limit|series|matrix)\s*\([^)]+\)',  # Function calls
-        r'\b\d+(?:\.\d+)?\s*[+\-*/^]\s*\d+(?:\.\d+)?',  # Basic arithmetic
-        r'\b[a-zA-Z]+\s*=\s*[^=\n]+',  # Variable assignments
-        r'\b[a-zA-Z]+\([^)]*\)\s*=\s*[^=\n]+',  # Function definitions
-        r'\$.*\$',  # LaTeX expressions (extract content)
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            # Return the first substantial match
-            for match in matches:
-                if len(match.strip()) > 3:  # Ignore very short matches
-                    if match.startswith('$') and match.endswith('$'):
-                        return match[1:-1]  # Remove LaTeX delimiters
-                    return match
+    if not _HAS_MATH_CHARS.search(text):
+        return None
+
+    # One scan over the text; matches are bucketed per source pattern
+    by_pattern: dict = {}
+    for m in _MATH_COMBINED.finditer(text):
+        by_pattern.setdefault(m.lastgroup, []).append(m.group())
+
+    for i in range(len(_MATH_PATTERN_STRS)):
+        # Return the first substantial match of the highest-priority pattern
+        for match in by_pattern.get(f"m{i}", ()):
+            if len(match.strip()) <= 3:  # Ignore very short matches
+                continue
+            # A lower-priority alternative that matched earlier in the
+            # text may have swallowed a higher-priority match; rescan
+            # those patterns on their own before accepting this one
+            for j in range(i):
+                masked = next(
+                    (m.group() for m in _MATH_PATTERNS[j].finditer(text)
+                     if len(m.group().strip()) > 3),
+                    None
+                )
+                if masked is not None:
+                    return masked
+            if match.startswith('$') and match.endswith('$'):
+                return match[1:-1]  # Remove LaTeX delimiters
+            return match
 
     return None
 
 
+@lru_cache(maxsize=512)
 def detect_basic_arithmetic(text: str) -> Optional[str]:
     """
     Detect basic arithmetic expressions that can be evaluated directly.
@@ -41,50 +118,35 @@ def detect_basic_arithmetic(text: str) -> Optional[str]:
     Looks for expressions like "2+2", "10*5", "100/4", etc.
     Also handles natural language queries like "what is 5 plus 3"
 
+    Results are memoized per message, mirroring detect_math_expression.
+
     Returns the extracted arithmetic expression or None.
     """
-    text_lower = text.lower().strip()
+    if not _HAS_MATH_CHARS.search(text):
+        return None
 
-    # Direct arithmetic patterns (numbers with operators)
-    arithmetic_patterns = [
-        r'\d+(?:\.\d+)?\s*[+\-*/]\s*\d+(?:\.\d+)?(?:\s*[+\-*/]\s*\d+(?:\.\d+)?)*',  # Multiple operations
-        r'\d+(?:\.\d+)?\s*\*\*\s*\d+(?:\.\d+)?',  # Exponentiation
-        r'\(\s*\d+(?:\.\d+)?\s*[+\-*/]\s*\d+(?:\.\d+)?\s*\)',  # Parenthesized expressions
-    ]
+    # Check for direct arithmetic patterns first (single scan)
+    by_pattern: dict = {}
+    for m in _ARITH_COMBINED.finditer(text):
+        by_pattern.setdefault(m.lastgroup, []).append(m.group())
 
-    # Check for direct arithmetic patterns first
-    for pattern in arithmetic_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for i in range(len(_ARITH_PATTERN_STRS)):
+        matches = by_pattern.get(f"a{i}")
         if matches:
             # Return the longest match (most complex expression)
             return max(matches, key=len)
 
-    # Natural language patterns
-    nl_patterns = [
-        # "what is X plus Y", "what is X minus Y", etc.
-        r'what\s+is\s+(\d+(?:\.\d+)?)\s*(plus|minus|times|multiplied\s+by|divided\s+by)\s+(\d+(?:\.\d+)?)',
-        # "calculate X + Y", "compute X * Y", etc.
-        r'(?:calculate|compute)\s+(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)',
-        # "X plus Y equals", "X times Y is", etc.
-        r'(\d+(?:\.\d+)?)\s*(plus|minus|times|multiplied\s+by|divided\s+by)\s+(\d+(?:\.\d+)?)\s*(?:equals|is|=)',
-    ]
-
-    for pattern in nl_patterns:
-        match = re.search(pattern, text_lower)
+    # Only the natural-language patterns need the lowercased copy, so the
+    # allocation is deferred past the direct-match fast path above
+    text_lower = text.lower().strip()
+    for pattern in _NL_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             groups = match.groups()
             if len(groups) == 3:  # Natural language with word operators
                 num1, op_word, num2 = groups
-                # Convert word operators to symbols
-                op_map = {
-                    'plus': '+',
-                    'minus': '-',
-                    'times': '*',
-                    'multiplied by': '*',
-                    'divided by': '/'
-                }
-                if op_word in op_map:
-                    return f"{num1}{op_map[op_word]}{num2}"
+                if op_word in _OP_MAP:
+                    return f"{num1}{_OP_MAP[op_word]}{num2}"
             elif len(groups) == 3 and groups[1] in '+-*/':  # Direct operators
                 num1, op, num2 = groups
                 return f"{num1}{op}{num2}"
@@ -92,6 +154,54 @@ def detect_basic_arithmetic(text: str) -> Optional[str]:
     return None
 
 
+# Indicators that an expression needs symbolic (SymPy) treatment
+_SYMBOLIC_INDICATORS = [
+    'solve', 'simplify', 'factor', 'diff', 'integrate', 'limit', 'series',
+    '=', 'x', 'y', 'z',  # Variables
+    'sin', 'cos', 'tan', 'exp', 'log', 'sqrt',  # Functions
+    'matrix', 'vector'  # Linear algebra
+]
+
+# Indicators that an expression is too complex for the arithmetic tool
+_COMPLEX_INDICATORS = [
+    'solve', 'simplify', 'factor', 'diff', 'integrate', 'limit', 'series',
+    '=', 'x', 'y', 'z', 'a', 'b', 'c',  # Variables
+    'sin', 'cos', 'tan', 'exp', 'log', 'sqrt',  # Functions
+    'matrix', 'vector'  # Linear algebra
+]
+
+
+def _contains_any(expression: str, indicators: list) -> bool:
+    """Check whether any indicator substring occurs in the expression."""
+    expr_lower = expression.lower()
+    return any(indicator in expr_lower for indicator in indicators)
+
+
+def classify_input(text: str) -> Optional[str]:
+    """
+    Classify user input into the tool that should handle it.
+
+    Runs each detector at most once (instead of re-scanning the text per
+    predicate) and returns "basic_arithmetic", "sympy", "numeric", or
+    None when no tool applies.
+    """
+    arith_expr = detect_basic_arithmetic(text)
+    if arith_expr and not _contains_any(arith_expr, _COMPLEX_INDICATORS):
+        return "basic_arithmetic"
+
+    math_expr = detect_math_expression(text)
+    if math_expr:
+        return "sympy" if _contains_any(math_expr, _SYMBOLIC_INDICATORS) else "numeric"
+
+    return None
+
+
+def clear_detector_caches() -> None:
+    """Clear the detector memoization caches (called on shutdown)."""
+    detect_math_expression.cache_clear()
+    detect_basic_arithmetic.cache_clear()
+
+
 def should_use_sympy(text: str) -> bool:
     """
     Determine if an expression should use SymPy vs numeric evaluation.
@@ -103,17 +213,7 @@ def should_use_sympy(text: str) -> bool:
     expression = detect_math_expression(text)
     if not expression:
         return False
-
-    # Check for symbolic indicators
-    symbolic_indicators = [
-        'solve', 'simplify', 'factor', 'diff', 'integrate', 'limit', 'series',
-        '=', 'x', 'y', 'z',  # Variables
-        'sin', 'cos', 'tan', 'exp', 'log', 'sqrt',  # Functions
-        'matrix', 'vector'  # Linear algebra
-    ]
-
-    expr_lower = expression.lower()
-    return any(indicator in expr_lower for indicator in symbolic_indicators)
+    return _contains_any(expression, _SYMBOLIC_INDICATORS)
 
 
 def is_basic_arithmetic(text: str) -> bool:
@@ -128,12 +228,4 @@ def is_basic_arithmetic(text: str) -> bool:
         return False
 
     # Make sure it doesn't have variables or complex functions
-    expr_lower = expr.lower()
-    complex_indicators = [
-        'solve', 'simplify', 'factor', 'diff', 'integrate', 'limit', 'series',
-        '=', 'x', 'y', 'z', 'a', 'b', 'c',  # Variables
-        'sin', 'cos', 'tan', 'exp', 'log', 'sqrt',  # Functions
-        'matrix', 'vector'  # Linear algebra
-    ]
-
-    return not any(indicator in expr_lower for indicator in complex_indicators)
+    return not _contains_any(expr, _COMPLEX_INDICATORS)
@@ -2,9 +2,20 @@
 Math tools package.
 """
 
-from math_solver.tools.base import MathTool
+from types import MappingProxyType
+
+from math_solver.tools.base import MathToolProtocol
 from math_solver.tools.arithmetic_tool import ArithmeticTool
 from math_solver.tools.sympy_tool import SymPyTool
 from math_solver.tools.numeric_tool import NumericTool
 
-__all__ = ["MathTool", "ArithmeticTool", "SymPyTool", "NumericTool"]
+# The tools are stateless, so one shared instance of each suffices.
+# Wrapped read-only; callers that want their own registry take a
+# dict(DEFAULT_TOOLS) copy.
+DEFAULT_TOOLS = MappingProxyType({
+    "basic_arithmetic": ArithmeticTool(),
+    "sympy": SymPyTool(),
+    "numeric": NumericTool()
+})
+
+__all__ = ["MathToolProtocol", "ArithmeticTool", "SymPyTool", "NumericTool", "DEFAULT_TOOLS"]
@@ -20,9 +20,10 @@ class UIComponents:
     def create_interface(self) -> gr.Blocks:
         """Create the main Gradio interface."""
 
-        async def handle_message(message: str, history: List[List[str]]) -> str:
-            """Wrapper for message handling."""
-            return await self.message_handler.handle_message(message, history)
+        async def handle_message(message: str, history: List[List[str]]):
+            """Wrapper yielding partial replies so the chat streams."""
+            async for partial in self.message_handler.stream_message(message, history):
+                yield partial
 
         with gr.Blocks(title="Mathe-Löser", theme=gr.themes.Soft()) as interface:
             gr.Markdown("# 🧮 Mathe-Löser")
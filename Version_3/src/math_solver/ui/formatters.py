@@ -4,6 +4,10 @@ Message formatting utilities for the UI.
 
 from typing import Dict, List, Any, TypedDict
 
+# Role prefixes for the rendered history, built once at import
+_USER_PFX = "**Du:** "
+_ASSISTANT_PFX = "**Assistent:** "
+
 
 class MessageChunk(TypedDict):
     """Type definition for message chunks."""
@@ -30,11 +34,11 @@ class MessageFormatter:
         if not history:
             return ""
 
-        formatted_messages = []
-        for user_msg, assistant_msg in history:
-            if user_msg:
-                formatted_messages.append(f"**Du:** {user_msg}")
-            if assistant_msg:
-                formatted_messages.append(f"**Assistent:** {assistant_msg}")
-
-        return "\n\n".join(formatted_messages)
+        # Single generator feeding join: no intermediate list, one pass
+        # over the history even when it spans hundreds of turns
+        return "\n\n".join(
+            prefix + msg
+            for user_msg, assistant_msg in history
+            for prefix, msg in ((_USER_PFX, user_msg), (_ASSISTANT_PFX, assistant_msg))
+            if msg
+        )
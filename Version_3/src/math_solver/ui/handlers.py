@@ -11,6 +11,11 @@ from math_solver.ui.formatters import MessageFormatter, MessageChunk
 
 logger = logging.getLogger(__name__)
 
+# Prefixes marking a correction command; only this many leading
+# characters need lowercasing to check for them
+_CORRECTION_PREFIXES = ("korrektur:", "korrigiere:")
+_CORRECTION_PREFIX_LEN = max(map(len, _CORRECTION_PREFIXES))
+
 
 class MessageHandler:
     """Handles message processing and chatbot interactions."""
@@ -25,23 +30,66 @@ class MessageHandler:
 
         This is used by Gradio's ChatInterface.
         """
-        if not message.strip():
+        stripped = message.strip()
+        if not stripped:
             return ""
 
         chatbot = self.chatbot_service.get_chatbot()
 
-        # Collect full response
-        full_response = ""
+        # Correction input: "korrektur: <Muster> => <richtige Antwort>"
+        if stripped[:_CORRECTION_PREFIX_LEN].lower().startswith(_CORRECTION_PREFIXES):
+            body = stripped.split(":", 1)[1].strip()
+            if "=>" in body:
+                pattern, correction = body.split("=>", 1)
+                pattern = pattern.strip()
+                correction = correction.strip()
+                # SQLite insert + commit goes to a worker thread so the
+                # fsync never stalls the event loop
+                await asyncio.to_thread(chatbot.add_correction, pattern, correction)
+                return f"✅ Korrektur gespeichert: „{pattern}“ → „{correction}“"
+            return "Format: korrektur: <Muster> => <richtige Antwort>"
+
+        # Collect the response parts and join once at the end; repeated
+        # `+=` on a growing string is quadratic in the reply length
+        parts: List[str] = []
         try:
-            # Get streaming response and collect it
             async for response_chunk in chatbot.generate_response_with_tools(message):
-                chunk_content = MessageFormatter.format_message_chunk(response_chunk)
-                full_response += chunk_content
+                parts.append(MessageFormatter.format_message_chunk(response_chunk))
         except Exception as e:
             logger.error(f"Chat response error: {e}")
-            full_response = f"Error: {str(e)}"
+            return f"Error: {str(e)}"
+
+        return "".join(parts)
+
+    async def stream_message(
+        self,
+        message: str,
+        history: List[List[str]]
+    ) -> AsyncGenerator[str, None]:
+        """
+        Yield the cumulative assistant reply as chunks arrive.
 
-        return full_response
+        This is the Gradio ChatInterface callback: yielding partial text
+        lets users read the answer while it streams instead of waiting
+        for the fully buffered response.
+        """
+        stripped = message.strip()
+        if not stripped or stripped[:_CORRECTION_PREFIX_LEN].lower().startswith(_CORRECTION_PREFIXES):
+            # Empty input and corrections produce a single, short reply
+            yield await self.handle_message(message, history)
+            return
+
+        chatbot = self.chatbot_service.get_chatbot()
+        parts: List[str] = []
+        try:
+            async for response_chunk in chatbot.generate_response_with_tools(message):
+                chunk_content = MessageFormatter.format_message_chunk(response_chunk)
+                if chunk_content:
+                    parts.append(chunk_content)
+                    yield "".join(parts)
+        except Exception as e:
+            logger.error(f"Chat response error: {e}")
+            yield f"Error: {str(e)}"
 
     async def handle_streaming_message(
         self,
@@ -2,19 +2,22 @@
 Utility functions for the math solver chatbot.
 """
 
-import signal
-from contextlib import contextmanager
+import asyncio
+from contextlib import asynccontextmanager
 
 
-@contextmanager
-def timeout_context(seconds: float):
-    """Context manager for timeout handling."""
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Operation timed out after {seconds} seconds")
+@asynccontextmanager
+async def timeout_context(seconds: float):
+    """
+    Async context manager for timeout handling.
 
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(int(seconds))
+    Wraps asyncio.timeout so the enclosed awaits are cancelled after the
+    deadline and a TimeoutError is raised. Unlike the previous
+    SIGALRM-based version this works off the main thread, nests, and
+    does not install signal handlers per call.
+    """
     try:
-        yield
-    finally:
-        signal.alarm(0)
+        async with asyncio.timeout(seconds):
+            yield
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Operation timed out after {seconds} seconds") from None